@@ -0,0 +1,140 @@
+# backend/api/cache.py
+from __future__ import annotations
+
+import hashlib
+import os
+import time
+import uuid
+from typing import Optional, Tuple
+
+import redis
+from fastapi import Request, Response
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+GENERATION_KEY = os.getenv("INDEX_GENERATION_KEY", "news:generation")
+EPOCH_KEY = os.getenv("INDEX_EPOCH_KEY", "news:epoch")
+# Sau một lỗi Redis, bỏ qua Redis trong khoảng này (giây) thay vì chờ timeout mỗi request
+REDIS_RETRY_SEC = float(os.getenv("CACHE_REDIS_RETRY_SEC", "5"))
+
+# TTL micro-cache ở nginx (s-maxage, giây). Trình duyệt luôn max-age=0 -> revalidate bằng ETag.
+LIST_MAX_AGE = int(os.getenv("CACHE_LIST_MAX_AGE", "1"))
+SEARCH_MAX_AGE = int(os.getenv("CACHE_SEARCH_MAX_AGE", "1"))
+COUNTERS_MAX_AGE = int(os.getenv("CACHE_COUNTERS_MAX_AGE", "2"))
+DETAIL_MAX_AGE = int(os.getenv("CACHE_DETAIL_MAX_AGE", "2"))
+
+_redis = redis.Redis.from_url(REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5)
+_redis_down_until = 0.0
+# Có lần ghi chưa tăng được thế hệ (Redis lỗi) -> không phát ETag cho tới khi bù lại
+_pending_bump = False
+
+
+def _redis_available() -> bool:
+    return time.monotonic() >= _redis_down_until
+
+
+def _mark_redis_down() -> None:
+    global _redis_down_until
+    _redis_down_until = time.monotonic() + REDIS_RETRY_SEC
+
+
+def _incr_generation() -> None:
+    pipe = _redis.pipeline(transaction=False)
+    pipe.set(EPOCH_KEY, uuid.uuid4().hex, nx=True)
+    pipe.incr(GENERATION_KEY)
+    pipe.execute()
+
+
+def current_generation() -> Optional[Tuple[str, int]]:
+    """
+    Đọc (epoch, thế hệ) của index. Epoch là token ngẫu nhiên tạo lại khi Redis mất dữ liệu,
+    nên bộ đếm có bắt đầu lại từ đầu cũng không trùng ETag cũ.
+    Trả về None nếu không đọc được đầy đủ -> không phát ETag.
+    """
+    global _pending_bump
+    if not _redis_available():
+        return None
+    try:
+        if _pending_bump:
+            _incr_generation()
+            _pending_bump = False
+        pipe = _redis.pipeline(transaction=False)
+        pipe.set(EPOCH_KEY, uuid.uuid4().hex, nx=True)
+        pipe.set(GENERATION_KEY, 0, nx=True)
+        pipe.get(EPOCH_KEY)
+        pipe.get(GENERATION_KEY)
+        _, _, epoch, generation = pipe.execute()
+    except redis.RedisError:
+        _mark_redis_down()
+        return None
+    if not epoch or generation is None:
+        return None
+    try:
+        return epoch.decode("utf-8"), int(generation)
+    except ValueError:
+        return None
+
+
+def bump_generation() -> None:
+    """
+    Tăng thế hệ sau mỗi lần ghi (create/update/delete) để mọi ETag cũ mất hiệu lực.
+    Gọi sau khi OpenSearch đã refresh (refresh="wait_for"), nếu không ETag mới
+    sẽ gắn với kết quả cũ. Redis lỗi -> ghi nhớ để bù ở lần đọc Redis thành công kế tiếp.
+    """
+    global _pending_bump
+    if _redis_available():
+        try:
+            _incr_generation()
+            return
+        except redis.RedisError:
+            _mark_redis_down()
+    _pending_bump = True
+
+
+def _etag(request: Request, epoch: str, generation: int) -> str:
+    url = request.url.path + "?" + request.url.query
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
+    return f'W/"{epoch[:12]}-{generation}-{digest}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # So sánh yếu: bỏ tiền tố W/ ở cả hai phía.
+    # Không xử lý "*": lúc này endpoint chưa biết tài nguyên có tồn tại hay không.
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == wanted:
+            return True
+    return False
+
+
+def conditional(request: Request, response: Response, max_age: int) -> Optional[Response]:
+    """
+    Gắn Cache-Control/ETag vào response. Nếu If-None-Match khớp thế hệ hiện tại
+    thì trả về 304 ngay (endpoint không cần truy vấn OpenSearch nữa), ngược lại trả None.
+    Phải gọi TRƯỚC khi truy vấn để một lần ghi xen giữa luôn làm ETag cũ đi.
+    """
+    cache_control = f"public, max-age=0, s-maxage={max_age}"
+    response.headers["Cache-Control"] = cache_control
+    # nginx ưu tiên X-Accel-Expires cho TTL của proxy_cache và không chuyển header này cho client
+    response.headers["X-Accel-Expires"] = str(max_age)
+
+    current = current_generation()
+    if current is None or _pending_bump:
+        return None
+
+    etag = _etag(request, *current)
+    response.headers["ETag"] = etag
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(
+            status_code=304,
+            headers={
+                "ETag": etag,
+                "Cache-Control": cache_control,
+                "X-Accel-Expires": str(max_age),
+            },
+        )
+    return None
@@ -1,7 +1,7 @@
 # backend/api/main.py
 from __future__ import annotations
 
-from fastapi import FastAPI, HTTPException, Depends, Query
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
 from datetime import datetime
@@ -12,6 +12,14 @@ from opensearchpy import OpenSearch
 from db import init_db
 from security import get_current_user, require_roles
 from auth import router as auth_router
+from cache import (
+    bump_generation,
+    conditional,
+    COUNTERS_MAX_AGE,
+    DETAIL_MAX_AGE,
+    LIST_MAX_AGE,
+    SEARCH_MAX_AGE,
+)
 
 # ===================== Config =====================
 OPENSEARCH_URL = os.getenv("OPENSEARCH_URL", "http://opensearch:9200")
@@ -96,7 +104,8 @@ def create_news(news: NewsIn, user=Depends(require_roles("admin", "reporter"))):
         "published_at": news.published_at.isoformat(),
         "author_id": user["id"],
     }
-    res = os_client.index(index=INDEX_NAME, body=doc)
+    res = os_client.index(index=INDEX_NAME, body=doc, refresh="wait_for")
+    bump_generation()
     return {"id": res["_id"], "result": res.get("result", "created")}
 
 
@@ -111,18 +120,23 @@ def update_news(id: str, news: NewsIn, user=Depends(get_current_user)):
 
     updated = {**old["_source"], **news.dict()}
     updated["published_at"] = news.published_at.isoformat()
-    res = os_client.index(index=INDEX_NAME, id=id, body=updated)
+    res = os_client.index(index=INDEX_NAME, id=id, body=updated, refresh="wait_for")
+    bump_generation()
     return {"id": id, "result": res.get("result", "updated")}
 
 
 @app.get("/news/counters", tags=["news"])
-def news_counters():
+def news_counters(request: Request, response: Response):
     """
     Đếm số bài theo từng danh mục + tổng (để hiển thị số trên chip).
     Ưu tiên dùng aggregation trên `category.keyword`.
     Nếu index KHÔNG có `category.keyword`, fallback sang `category`.
     Nếu vẫn lỗi -> quét toàn bộ và tự cộng dồn.
     """
+    not_modified = conditional(request, response, COUNTERS_MAX_AGE)
+    if not_modified is not None:
+        return not_modified
+
     # 1) Thử agg trên category.keyword
     for field in ["category.keyword", "category"]:
         try:
@@ -168,7 +182,11 @@ def news_counters():
 
 
 @app.get("/news/{id}", tags=["news"])
-def get_news(id: str):
+def get_news(id: str, request: Request, response: Response):
+    not_modified = conditional(request, response, DETAIL_MAX_AGE)
+    if not_modified is not None:
+        return not_modified
+
     res = os_client.get(index=INDEX_NAME, id=id, ignore=[404])
     if not res or not res.get("found"):
         raise HTTPException(404, "Không tìm thấy tin")
@@ -184,13 +202,16 @@ def delete_news(id: str, user=Depends(get_current_user)):
     if user["role"] != "admin" and doc["_source"].get("author_id") != user["id"]:
         raise HTTPException(403, "Bạn không có quyền xoá")
 
-    os_client.delete(index=INDEX_NAME, id=id)
+    os_client.delete(index=INDEX_NAME, id=id, refresh="wait_for")
+    bump_generation()
     return {"deleted": id}
 
 
 # ===================== LIST & FILTER =====================
 @app.get("/news", tags=["news"])
 def list_news(
+    request: Request,
+    response: Response,
     category: Optional[str] = Query(None),
     size: int = Query(50, le=200),
     from_: int = Query(0, alias="from"),
@@ -198,6 +219,10 @@ def list_news(
     """
     Trả toàn bộ bài (match_all) hoặc lọc theo category nếu có ?category=...
     """
+    not_modified = conditional(request, response, LIST_MAX_AGE)
+    if not_modified is not None:
+        return not_modified
+
     if category:
         q = {"query": _category_query(category)}
     else:
@@ -213,11 +238,19 @@ def list_news(
 
 @app.get("/news/category/{category}", tags=["news"])
 def news_by_category(
-    category: str, size: int = Query(50, le=200), from_: int = Query(0, alias="from")
+    category: str,
+    request: Request,
+    response: Response,
+    size: int = Query(50, le=200),
+    from_: int = Query(0, alias="from"),
 ):
     """
     Lọc thuần theo danh mục (phục vụ các chip Thế giới/Công nghệ/…).
     """
+    not_modified = conditional(request, response, LIST_MAX_AGE)
+    if not_modified is not None:
+        return not_modified
+
     q = {
         "query": _category_query(category),
         "sort": [{"published_at": {"order": "desc"}}],
@@ -231,6 +264,8 @@ def news_by_category(
 # ===================== SEARCH =====================
 @app.get("/search", tags=["news"])
 def search(
+    request: Request,
+    response: Response,
     q: Optional[str] = Query(None),
     size: int = Query(10, le=100),
     from_: int = Query(0, alias="from"),
@@ -241,6 +276,10 @@ def search(
     Nếu có category thì kết hợp lọc category.
     Nếu không có gì -> match_all.
     """
+    not_modified = conditional(request, response, SEARCH_MAX_AGE)
+    if not_modified is not None:
+        return not_modified
+
     must: List[Dict[str, Any]] = []
 
     if q:
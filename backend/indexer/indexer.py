@@ -4,6 +4,8 @@ import time
 from datetime import datetime
 import psycopg2
 from psycopg2.extras import RealDictCursor
+import redis
+import uuid
 from opensearchpy import OpenSearch, helpers
 from urllib.parse import urlparse
 from pathlib import Path
@@ -16,6 +18,11 @@ INDEX_NAME = os.getenv("INDEX_NAME", "news")
 BATCH_SIZE = int(os.getenv("INDEXER_BATCH_SIZE", "1000"))
 SLEEP_SEC = int(os.getenv("INDEXER_INTERVAL_SEC", "30"))
 CHECKPOINT_FILE = os.getenv("INDEXER_CHECKPOINT_FILE", "/tmp/indexer_checkpoint.txt")
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+GENERATION_KEY = os.getenv("INDEX_GENERATION_KEY", "news:generation")
+EPOCH_KEY = os.getenv("INDEX_EPOCH_KEY", "news:epoch")
+
+redis_client = redis.Redis.from_url(REDIS_URL, socket_timeout=2, socket_connect_timeout=2)
 
 def make_os_client():
     u = urlparse(OPENSEARCH_URL)
@@ -59,6 +66,14 @@ def get_checkpoint() -> datetime | None:
 def save_checkpoint(dt: datetime):
     Path(CHECKPOINT_FILE).write_text(dt.isoformat())
 
+def bump_generation():
+    # báo cho API biết index đã đổi -> ETag cũ hết hiệu lực.
+    # Lỗi Redis được ném ra: checkpoint chưa lưu nên vòng sau nạp lại batch và tăng lại.
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.set(EPOCH_KEY, uuid.uuid4().hex, nx=True)
+    pipe.incr(GENERATION_KEY)
+    pipe.execute()
+
 def index_batch(os_client, rows):
     def gen():
         for r in rows:
@@ -85,7 +100,8 @@ def index_batch(os_client, rows):
                 },
             }
     if rows:
-        helpers.bulk(os_client, gen())
+        helpers.bulk(os_client, gen(), refresh="wait_for")
+        bump_generation()
 
 def run_once(os_client):
     # kết nối DB mỗi lần chạy để tránh idle timeout